@@ -15,5 +15,20 @@ except PackageNotFoundError:  # pragma: no cover
 finally:
     del version, PackageNotFoundError
 
-from .cache import BiocFileCache
+from typing import TYPE_CHECKING
+
 from .config import CacheConfig
+
+if TYPE_CHECKING:
+    from .cache import BiocFileCache
+
+__all__ = ["BiocFileCache", "CacheConfig"]
+
+
+def __getattr__(name):
+    # Defer importing SQLAlchemy until the cache itself is needed
+    if name == "BiocFileCache":
+        from .cache import BiocFileCache
+
+        return BiocFileCache
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
@@ -1,29 +1,44 @@
+import atexit
 import json
 import logging
+import os
+import threading
+import weakref
+from concurrent.futures import ThreadPoolExecutor
 from contextlib import contextmanager
 from datetime import datetime
 from pathlib import Path
+from shutil import move
 from time import sleep, time
-from typing import Any, Dict, Iterator, List, Literal, Optional, Tuple, Union
+from typing import Any, Callable, Dict, Iterator, List, Literal, Optional, Tuple, Union
+from urllib.parse import urlparse
 
-from sqlalchemy import create_engine, func
+from sqlalchemy import bindparam, create_engine, event, func, insert, select, text
+from sqlalchemy.dialects.sqlite import insert as sqlite_insert
+from sqlalchemy.engine import Engine
+from sqlalchemy.exc import IntegrityError, OperationalError
 from sqlalchemy.orm import Session, sessionmaker
 from sqlalchemy.pool import QueuePool
 
 from .config import CacheConfig
+from .const import SCHEMA_VERSION, SQLITE_PRAGMAS
 from .exceptions import (
     BiocCacheError,
     CacheSizeLimitError,
     InvalidRnameError,
+    MetadataExistsError,
     NoFpathError,
     RnameExistsError,
     RpathTimeoutError,
 )
-from .models import Base, Resource
+from .models import Base, Metadata, Resource
 from .utils import (
     calculate_file_hash,
     copy_or_move,
+    create_http_session,
     create_tmp_dir,
+    decompress_file,
+    download_web_file,
     generate_id,
     get_file_size,
     validate_rname,
@@ -36,6 +51,138 @@ __license__ = "MIT"
 logger = logging.getLogger(__name__)
 
 
+# Tables and indexes expected in the cache database
+_SCHEMA_OBJECTS = [table.name for table in Base.metadata.sorted_tables] + [
+    index.name for table in Base.metadata.sorted_tables for index in table.indexes
+]
+
+
+class _SharedEngine:
+    """An engine shared by the caches open on one database file."""
+
+    def __init__(self, key: Tuple[str, Tuple[Tuple[str, Any], ...]], engine: Engine, inode: int):
+        self.key = key
+        self.engine = engine
+        self.inode = inode
+        self.users = 0
+
+        # Whether resources may have been added since the last cleanup, and
+        # the earliest expiration left after it
+        self.dirty = True
+        self.next_expiry: Optional[datetime] = None
+
+
+_ENGINES: Dict[Tuple[str, Tuple[Tuple[str, Any], ...]], _SharedEngine] = {}
+_ENGINES_LOCK = threading.Lock()
+
+
+def _create_engine(db_path: Path, pragmas: Dict[str, Any]) -> Engine:
+    """Create an engine that applies ``pragmas`` to every new connection."""
+    engine = create_engine(
+        f"sqlite:///{db_path}",
+        poolclass=QueuePool,
+        pool_size=5,
+        max_overflow=10,
+        pool_timeout=30,
+        pool_pre_ping=True,
+        connect_args={"check_same_thread": False},
+    )
+
+    @event.listens_for(engine, "connect")
+    def _set_sqlite_pragmas(dbapi_connection, connection_record):
+        cursor = dbapi_connection.cursor()
+        for key, value in pragmas.items():
+            cursor.execute(f"PRAGMA {key}={value}")
+        cursor.close()
+
+    return engine
+
+
+def _acquire_engine(db_path: Path, pragmas: Dict[str, Any]) -> Tuple[_SharedEngine, bool]:
+    """Get the shared engine for a database file, creating it on first use.
+
+    Engines are reused across :py:class:`BiocFileCache` instances pointing at
+    the same database, so repeated instantiation does not reopen connections.
+    A cached engine is replaced if the database file was removed or swapped
+    out since it was created. Every call must be paired with
+    :py:func:`_release_engine`.
+
+    Returns:
+        The shared engine, and whether it was newly created.
+    """
+    key = (str(db_path.resolve()), tuple(sorted(pragmas.items())))
+    with _ENGINES_LOCK:
+        shared = _ENGINES.get(key)
+        created = False
+        if shared is not None:
+            try:
+                stale = os.stat(db_path).st_ino != shared.inode
+            except FileNotFoundError:
+                stale = True
+
+            if stale:
+                # Instances still using it keep it until they are released
+                shared.engine.dispose()
+                shared = None
+
+        if shared is None:
+            engine = _create_engine(db_path, pragmas)
+            with engine.connect():
+                pass  # creates the database file
+            shared = _SharedEngine(key, engine, os.stat(db_path).st_ino)
+            _ENGINES[key] = shared
+            created = True
+
+        shared.users += 1
+        return shared, created
+
+
+def _release_engine(shared: _SharedEngine) -> None:
+    """Release a shared engine, closing its connections once it has no users left."""
+    with _ENGINES_LOCK:
+        shared.users -= 1
+        if shared.users > 0:
+            return
+
+        if _ENGINES.get(shared.key) is shared:
+            del _ENGINES[shared.key]
+    shared.engine.dispose()
+
+
+@atexit.register
+def _dispose_engines() -> None:
+    with _ENGINES_LOCK:
+        for shared in _ENGINES.values():
+            shared.engine.dispose()
+        _ENGINES.clear()
+
+
+def _unlink(path: Union[str, Path]) -> None:
+    """Remove a file, ignoring it if it is already gone."""
+    try:
+        os.unlink(path)
+    except FileNotFoundError:
+        pass
+
+
+def _undo_store(source: Path, target: Path, action: str, compress: bool) -> Callable[[], None]:
+    """Get a function that reverts storing ``source`` at ``target`` with :py:func:`~.utils.copy_or_move`."""
+    if action == "asis":
+        return lambda: None
+
+    if action != "move":
+        return lambda: _unlink(target)
+
+    def move_back() -> None:
+        if compress:
+            decompress_file(target, source)
+            _unlink(target)
+        else:
+            move(str(target), source)
+
+    return move_back
+
+
 class BiocFileCache:
     """Enhanced file caching module.
 
@@ -47,6 +194,13 @@ class BiocFileCache:
     - Automatic cleanup of expired resources
     """
 
+    _SEARCHABLE_FIELDS = {
+        "rname": Resource.rname,
+        "rtype": Resource.rtype,
+        "rid": Resource.rid,
+        "tags": Resource.tags,
+    }
+
     def __init__(self, cache_dir: Optional[Union[str, Path]] = None, config: Optional[CacheConfig] = None):
         """Initialize cache with optional configuration.
 
@@ -65,6 +219,8 @@ class BiocFileCache:
             config = CacheConfig(cache_dir=cache_dir)
 
         self.config = config
+        self._local = threading.local()
+        self._http = None  # created on the first web download
         self._setup_cache_dir()
         self._setup_database()
         self._last_cleanup = datetime.now()
@@ -75,18 +231,44 @@ class BiocFileCache:
 
     def _setup_database(self) -> None:
         db_path = self.config.cache_dir / "BiocFileCache.sqlite"
-        self.engine = create_engine(
-            f"sqlite:///{db_path}",
-            poolclass=QueuePool,
-            pool_size=5,
-            max_overflow=10,
-            pool_timeout=30,
-            connect_args={"check_same_thread": False},
-        )
+        pragmas = {**SQLITE_PRAGMAS, **(self.config.sqlite_pragmas or {})}
+        shared, created = _acquire_engine(db_path, pragmas)
+        self._shared = shared
+        self.engine = shared.engine
+
+        # Release the engine when the cache is closed or garbage collected
+        self._release = weakref.finalize(self, _release_engine, shared)
 
-        Base.metadata.create_all(self.engine)
         self.SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=self.engine)
 
+        # A reused engine was already checked against this database file
+        if not created:
+            return
+
+        # One indexed lookup on sqlite_master instead of the per-table
+        # introspection `create_all` runs on every instantiation.
+        with self.engine.connect() as conn:
+            existing = conn.execute(
+                text("SELECT count(*) FROM sqlite_master WHERE name IN :names").bindparams(
+                    bindparam("names", expanding=True)
+                ),
+                {"names": _SCHEMA_OBJECTS},
+            ).scalar()
+
+        if existing != len(_SCHEMA_OBJECTS):
+            with self.engine.begin() as conn:
+                Base.metadata.create_all(conn)
+                # `create_all` skips existing tables, so add indexes introduced
+                # since an older cache was created.
+                for table in Base.metadata.sorted_tables:
+                    for index in table.indexes:
+                        index.create(conn, checkfirst=True)
+                conn.execute(
+                    sqlite_insert(Metadata)
+                    .values(key="schema_version", value=SCHEMA_VERSION)
+                    .on_conflict_do_nothing(index_elements=["key"])
+                )
+
     def _get_detached_resource(self, session: Session, resource: Resource) -> Optional[Resource]:
         """Get a detached copy of a resource."""
         if resource is None:
@@ -101,13 +283,41 @@ class BiocFileCache:
     def __exit__(self, exc_type, exc_val, exc_tb) -> None:
         self.close()
 
+    def _get_http_session(self) -> Optional[Any]:
+        """Get the HTTP session for web downloads, creating it on first use."""
+        if self._http is None:
+            self._http = create_http_session()
+        return self._http
+
     def close(self) -> None:
         """Clean up resources."""
-        self.engine.dispose()
+        if not self._release.alive:
+            return  # already closed
+
+        if self._http is not None:
+            self._http.close()
+
+        # Refresh query planner statistics for indexes that need it. This is
+        # only an optimization, so a database that is gone or locked is fine.
+        try:
+            with self.engine.connect() as conn:
+                conn.exec_driver_sql("PRAGMA optimize")
+        except OperationalError as e:
+            logger.warning(f"Skipped optimizing the cache database: {e}")
+        self._release()
 
     @contextmanager
     def get_session(self) -> Iterator[Session]:
-        """Provide database session with automatic cleanup."""
+        """Provide database session with automatic cleanup.
+
+        Inside :py:meth:`batch`, the batch's session is reused and committed
+        when the batch exits.
+        """
+        batch_session = getattr(self._local, "batch_session", None)
+        if batch_session is not None:
+            yield batch_session
+            return
+
         session = self.SessionLocal()
         try:
             yield session
@@ -118,6 +328,88 @@ class BiocFileCache:
         finally:
             session.close()
 
+    @contextmanager
+    def batch(self) -> Iterator[None]:
+        """Run several cache operations in a single transaction.
+
+        Database changes are committed once when the block exits, or rolled
+        back together if it raises. On rollback, files stored by the batch's
+        operations are undone as well: moved files are moved back to their
+        source, copies are removed, and updated or removed files are
+        restored.
+
+        Example:
+
+            .. code-block:: python
+
+                with cache.batch():
+                    cache.add("test1", "path/to/test1.txt")
+                    cache.add("test2", "path/to/test2.txt")
+        """
+        if getattr(self._local, "batch_session", None) is not None:
+            yield  # already inside a batch
+            return
+
+        session = self.SessionLocal()
+        self._local.batch_session = session
+        self._local.batch_files = []
+        try:
+            yield
+            session.commit()
+        except BaseException:
+            session.rollback()
+            self._undo_files(self._local.batch_files)
+            raise
+        else:
+            for _, done in self._local.batch_files:
+                if done is not None:
+                    done()
+        finally:
+            session.close()
+            self._local.batch_session = None
+            self._local.batch_files = None
+
+    def _track_files(self, undo: Callable[[], None], done: Optional[Callable[[], None]] = None) -> None:
+        """Register a file operation made as part of a transaction.
+
+        Inside :py:meth:`batch`, ``undo`` runs if the batch rolls back and
+        ``done`` once it commits. Outside a batch the operation is already
+        committed, so ``done`` runs right away. Callers outside a batch must
+        therefore register after their session has been committed.
+        """
+        batch_files = getattr(self._local, "batch_files", None)
+        if batch_files is not None:
+            batch_files.append((undo, done))
+        elif done is not None:
+            done()
+
+    def _undo_files(self, batch_files: List[Tuple[Callable[[], None], Optional[Callable[[], None]]]]) -> None:
+        """Undo file operations of a rolled back batch, most recent first."""
+        for undo, _ in reversed(batch_files):
+            try:
+                undo()
+            except Exception as e:
+                logger.error("Failed to undo a file operation of a rolled back batch", exc_info=e)
+
+    def _remove_file(self, path: Union[str, Path]) -> None:
+        """Remove a cached file as part of a transaction.
+
+        Inside :py:meth:`batch`, the file is moved aside instead and only
+        deleted once the batch commits, so a rollback can put it back.
+        """
+        if getattr(self._local, "batch_files", None) is None:
+            _unlink(path)
+            return
+
+        path = Path(path)
+        backup = path.with_name(f"{path.name}.{generate_id()}.bak")
+        try:
+            os.replace(path, backup)
+        except FileNotFoundError:
+            return
+
+        self._track_files(lambda: os.replace(backup, path), lambda: _unlink(backup))
+
     def _check_cache_size(self, new_size: int) -> None:
         """Verify cache size limit won't be exceeded."""
         if self.config.max_size_bytes is None:
@@ -131,7 +423,7 @@ class BiocFileCache:
 
     def _validate_rname(self, rname: str) -> None:
         """Validate resource name format."""
-        if not validate_rname(rname, self.config.rname_pattern):
+        if not validate_rname(rname, self.config._rname_re):
             raise InvalidRnameError(f"Resource name '{rname}' doesn't match pattern " f"'{self.config.rname_pattern}'")
 
     def _should_cleanup(self) -> bool:
@@ -145,6 +437,10 @@ class BiocFileCache:
 
         return datetime.now() - self._last_cleanup > self.config.cleanup_interval
 
+    def _mark_dirty(self) -> None:
+        """Make the next :py:meth:`cleanup` query the database again."""
+        self._shared.dirty = True
+
     def cleanup(self) -> int:
         """Remove expired resources from the cache.
 
@@ -154,35 +450,66 @@ class BiocFileCache:
         Note:
             - If `cleanup_interval` is None, this method will still run if called explicitly.
             - Only removes resources with non-None expiration dates.
+            - Skips the database entirely when nothing was added since the
+              last cleanup and the earliest remaining expiration has not been
+              reached yet. This is tracked per database for all caches in the
+              process that share an engine (same directory and
+              ``sqlite_pragmas``). Expired resources added by other processes
+              are only picked up once a cache in this process adds or imports
+              resources again.
         """
         if not any([self.config.cleanup_interval, self._should_cleanup()]):
             return 0  # Early return if automatic cleanup is disabled
 
+        now = datetime.now()
+        shared = self._shared
+        if not shared.dirty and (shared.next_expiry is None or now < shared.next_expiry):
+            self._last_cleanup = now
+            return 0  # Nothing can have expired since the last cleanup
+
+        # Cleared before reading, so resources committed while this runs
+        # mark the cache dirty again
+        shared.dirty = False
         removed = 0
-        with self.get_session() as session:
-            # Only query resources that have expiration dates
-            expired = (
-                session.query(Resource)
-                .filter(
-                    Resource.expires.isnot(None),  # Only check resources with expiration
-                    Resource.expires < datetime.now(),
+        try:
+            with self.get_session() as session:
+                # Only query resources that have expiration dates
+                expired = (
+                    session.query(Resource)
+                    .filter(
+                        Resource.expires.isnot(None),  # Only check resources with expiration
+                        Resource.expires < now,
+                    )
+                    .all()
                 )
-                .all()
-            )
 
-            for resource in expired:
-                try:
-                    Path(resource.rpath).unlink(missing_ok=True)
-                    session.delete(resource)
-                    removed += 1
-                except Exception as e:
-                    logger.error(f"Failed to remove expired resource: {resource.rname}", exc_info=e)
+                for resource in expired:
+                    try:
+                        self._remove_file(resource.rpath)
+                        session.delete(resource)
+                        removed += 1
+                    except Exception as e:
+                        logger.error(f"Failed to remove expired resource: {resource.rname}", exc_info=e)
 
-            session.commit()
+                session.flush()
+                next_expiry = session.query(func.min(Resource.expires)).scalar()
+        except BaseException:
+            shared.dirty = True
+            raise
 
-        self._last_cleanup = datetime.now()
+        def swept() -> None:
+            shared.next_expiry = next_expiry
+
+        # Inside a batch, the sweep only counts once the batch commits
+        self._track_files(self._mark_dirty, swept)
+        self._last_cleanup = now
         return removed
 
+    def _exists(self, rname: str) -> bool:
+        """Check whether a resource name is registered, without touching its access time."""
+        with self.get_session() as session:
+            return session.query(Resource.id).filter(Resource.rname == rname).first() is not None
+
     def get(self, rname: str) -> Optional[Resource]:
         """Get resource by name from cache.
 
@@ -207,7 +534,7 @@ class BiocFileCache:
 
                 # Update access time
                 resource.access_time = datetime.now()
-                session.commit()
+                session.flush()
                 return self._get_detached_resource(session, resource)
 
         return None
@@ -217,7 +544,7 @@ class BiocFileCache:
         rname: str,
         fpath: Union[str, Path],
         rtype: Literal["local", "web", "relative"] = "local",
-        action: Literal["copy", "move", "asis"] = "copy",
+        action: Literal["copy", "move", "link", "asis"] = "copy",
         tags: Optional[List[str]] = None,
         expires: Optional[datetime] = None,
         ext: bool = False,
@@ -229,7 +556,7 @@ class BiocFileCache:
                 Name to identify the resource in cache.
 
             fpath:
-                Path to the source file.
+                Path to the source file, or its URL if ``rtype`` is ``web``.
 
             rtype:
                 Type of resource.
@@ -237,8 +564,12 @@ class BiocFileCache:
                 Defaults to ``local``.
 
             action:
-                How to handle the file ("copy", "move", or "asis").
+                How to handle the file ("copy", "move", "link", or "asis").
+                ``link`` hard links the file into the cache when possible,
+                so later changes to the source also change the cached file.
                 Defaults to ``copy``.
+                Ignored for ``web`` resources, which are always
+                downloaded into the cache.
 
             tags:
                 Optional list of tags for categorization.
@@ -255,19 +586,40 @@ class BiocFileCache:
             The `Resource` object added to the cache.
         """
         self._validate_rname(rname)
-        fpath = Path(fpath)
 
-        if not fpath.exists():
-            raise NoFpathError(f"Resource at '{fpath}' does not exist")
-
-        if self.get(rname) is not None:
-            raise RnameExistsError(f"Resource '{rname}' already exists")
+        if rtype == "web":
+            url = str(fpath)
+            if self._exists(rname):
+                raise RnameExistsError(f"Resource '{rname}' already exists")
+
+            # Download next to its final location, then move it into place
+            rid = generate_id()
+            fpath = self.config.cache_dir / f"{rid}.download"
+            download_web_file(url, fpath, self._get_http_session(), self.config.download_timeout)
+            suffix = Path(urlparse(url).path).suffix
+            action = "move"
+        else:
+            url = None
+            fpath = Path(fpath)
+            if not fpath.exists():
+                raise NoFpathError(f"Resource at '{fpath}' does not exist")
+
+            if self._exists(rname):
+                raise RnameExistsError(f"Resource '{rname}' already exists")
+
+            rid = generate_id()
+            suffix = fpath.suffix
 
         # Generate paths and check size
-        rid = generate_id()
-        rpath = self.config.cache_dir / f"{rid}{fpath.suffix if ext else ''}" if action != "asis" else fpath
+        rpath = self.config.cache_dir / f"{rid}{suffix if ext else ''}" if action != "asis" else fpath
+        size = get_file_size(fpath)
 
-        self._check_cache_size(get_file_size(fpath))
+        try:
+            self._check_cache_size(size)
+        except CacheSizeLimitError:
+            if url is not None:
+                _unlink(fpath)
+            raise
 
         # Create resource record
         resource = Resource(
@@ -275,47 +627,55 @@ class BiocFileCache:
             rname=rname,
             rpath=str(rpath),
             rtype=rtype,
-            fpath=str(fpath),
+            fpath=url or str(fpath),
             tags=",".join(tags) if tags else None,
             expires=expires,
-            size_bytes=get_file_size(fpath),
+            size_bytes=size,
         )
 
         # Store file and update database
         with self.get_session() as session:
             session.add(resource)
-            session.commit()
+            session.flush()
 
             try:
                 copy_or_move(fpath, rpath, rname, action, self.config.compression)
 
                 # Calculate and store checksum
                 resource.etag = calculate_file_hash(rpath, self.config.hash_algorithm)
-                session.commit()
-                result = self._get_detached_resource(session, resource)
-                return result
+                session.flush()
+                resource = self._get_detached_resource(session, resource)
 
             except Exception as e:
                 session.delete(resource)
-                session.commit()
+                session.flush()
+                if url is not None:
+                    _unlink(fpath)
                 raise BiocCacheError("Failed to add resource") from e
 
+        # Downloads only exist in the cache, so undoing them is a removal. The
+        # resource only counts for cleanup once it is committed.
+        undo = _undo_store(fpath, rpath, "copy" if url is not None else action, self.config.compression)
+        self._track_files(undo, self._mark_dirty)
+        return resource
+
     def add_batch(self, resources: List[Dict[str, Any]]) -> List[Resource]:
         """Add multiple resources in a single transaction.
 
+        If any resource fails to be added, none of them are recorded.
+
         Args:
             resources:
                 List of resources to add.
         """
         results = []
-        with self.get_session() as session:
+        with self.batch():
             for resource_info in resources:
                 try:
                     resource = self.add(**resource_info)
                     results.append(resource)
                 except Exception as e:
                     logger.error(f"Failed to add resource: {resource_info.get('rname')}", exc_info=e)
-                    session.rollback()
                     raise
         return results
 
@@ -323,7 +683,7 @@ class BiocFileCache:
         self,
         rname: str,
         fpath: Union[str, Path],
-        action: Literal["copy", "move", "asis"] = "copy",
+        action: Literal["copy", "move", "link", "asis"] = "copy",
         tags: Optional[List[str]] = None,
     ) -> Resource:
         """Update an existing resource.
@@ -336,7 +696,7 @@ class BiocFileCache:
                 Path to the new source file.
 
             action:
-                Either ``copy``, ``move`` or ``asis``.
+                Either ``copy``, ``move``, ``link`` or ``asis``.
                 Defaults to ``copy``.
 
             tags:
@@ -357,6 +717,13 @@ class BiocFileCache:
                 return self.add(rname=rname, fpath=fpath, action=action)
 
             old_path = Path(resource.rpath)
+
+            # Inside a batch, keep the current file so a rollback can restore it
+            backup = None
+            if action != "asis" and getattr(self._local, "batch_files", None) is not None and old_path.exists():
+                backup = old_path.with_name(f"{old_path.name}.{generate_id()}.bak")
+                os.replace(old_path, backup)
+
             try:
                 copy_or_move(fpath, old_path, rname, action, self.config.compression)
 
@@ -367,13 +734,24 @@ class BiocFileCache:
                 if tags is not None:
                     resource.tags = ",".join(tags)
 
-                session.commit()
-                return self._get_detached_resource(session, resource)
+                session.flush()
+                resource = self._get_detached_resource(session, resource)
 
             except Exception as e:
-                session.rollback()
+                if backup is not None:
+                    os.replace(backup, old_path)
                 raise BiocCacheError("Failed to update resource") from e
 
+            if backup is not None:
+                undo_store = _undo_store(fpath, old_path, action, self.config.compression)
+
+                def restore() -> None:
+                    undo_store()
+                    os.replace(backup, old_path)
+
+                self._track_files(restore, lambda: _unlink(backup))
+            return resource
+
     def remove(self, rname: str) -> None:
         """Remove a resource from cache by name.
 
@@ -392,16 +770,13 @@ class BiocFileCache:
             if resource is not None:
                 try:
                     # Try to remove the file first
-                    rpath = Path(resource.rpath)
-                    if rpath.exists():
-                        rpath.unlink()
+                    self._remove_file(resource.rpath)
 
                     # Then remove from database
                     session.delete(resource)
-                    session.commit()
+                    session.flush()
 
                 except Exception as e:
-                    session.rollback()
                     raise BiocCacheError(f"Failed to remove resource '{rname}'") from e
 
     def list_resources(
@@ -434,20 +809,82 @@ class BiocFileCache:
             if rtype:
                 query = query.filter(Resource.rtype == rtype)
             if expired is not None:
+                now = datetime.now()
                 if expired:
                     query = query.filter(
                         Resource.expires.isnot(None),  # Only check resources with expiration
-                        Resource.expires < datetime.now(),
+                        Resource.expires < now,
                     )
                 else:
                     query = query.filter(
                         (Resource.expires.is_(None))  # Never expires
-                        | (Resource.expires > datetime.now())  # Not yet expired
+                        | (Resource.expires > now)  # Not yet expired
                     )
 
             resources = query.all()
             return [self._get_detached_resource(session, r) for r in resources]
 
+    def count(self, rtype: Optional[str] = None) -> int:
+        """Count resources in the cache without loading them.
+
+        Args:
+            rtype:
+                Only count resources of this type.
+
+        Returns:
+            Number of resources.
+        """
+        with self.get_session() as session:
+            query = session.query(func.count(Resource.id))
+            if rtype:
+                query = query.filter(Resource.rtype == rtype)
+            return query.scalar()
+
+    def add_metadata(self, key: str, value: str) -> None:
+        """Add a key-value pair to the cache metadata.
+
+        Args:
+            key:
+                Metadata key.
+
+            value:
+                Metadata value.
+
+        Raises:
+            MetadataExistsError: If the key already exists.
+        """
+        try:
+            with self.get_session() as session:
+                session.execute(insert(Metadata).values(key=key, value=value))
+        except IntegrityError as e:
+            raise MetadataExistsError(f"Metadata key '{key}' already exists") from e
+
+    def get_metadata(self, key: str) -> Optional[str]:
+        """Get the value stored for a metadata key.
+
+        Args:
+            key:
+                Metadata key.
+
+        Returns:
+            The stored value, or None if the key does not exist.
+        """
+        with self.get_session() as session:
+            return session.query(Metadata.value).filter(Metadata.key == key).scalar()
+
+    def check_metadata_key(self, key: str) -> bool:
+        """Check if a metadata key exists.
+
+        Args:
+            key:
+                Metadata key.
+
+        Returns:
+            True if the key exists, False otherwise.
+        """
+        with self.get_session() as session:
+            return session.query(Metadata.key).filter(Metadata.key == key).first() is not None
+
     def validate_resource(self, resource: Resource) -> bool:
         """Validate resource integrity.
 
@@ -458,14 +895,18 @@ class BiocFileCache:
         Returns:
             True if resource is valid, False otherwise.
         """
-        if not resource.etag:
+        return self._validate_file(resource.rname, resource.rpath, resource.etag)
+
+    def _validate_file(self, rname: str, rpath: str, etag: Optional[str]) -> bool:
+        """Compare the checksum of a cached file against its stored etag."""
+        if not etag:
             return True  # No validation if no checksum
 
         try:
-            current_hash = calculate_file_hash(Path(resource.rpath), self.config.hash_algorithm)
-            return current_hash == resource.etag
+            current_hash = calculate_file_hash(Path(rpath), self.config.hash_algorithm)
+            return current_hash == etag
         except Exception as e:
-            logger.error(f"Failed to validate resource: {resource.rname}", exc_info=e)
+            logger.error(f"Failed to validate resource: {rname}", exc_info=e)
             return False
 
     def get_cache_size(self) -> int:
@@ -501,14 +942,16 @@ class BiocFileCache:
 
         with self.get_session() as session:
             for resource_data in data["resources"]:
-                resource = self._get(session, resource_data["rname"])
+                resource = session.query(Resource).filter(Resource.rname == resource_data["rname"]).first()
                 if resource:
                     resource.tags = resource_data["tags"]
                     resource.expires = (
                         datetime.fromisoformat(resource_data["expires"]) if resource_data["expires"] else None
                     )
                     session.merge(resource)
-            session.commit()
+
+        # Expirations may have moved earlier once the changes are committed
+        self._track_files(lambda: None, self._mark_dirty)
 
     def verify_cache(self) -> Tuple[int, int]:
         """Verify integrity of all cached resources.
@@ -517,11 +960,18 @@ class BiocFileCache:
             Tuple of (valid_count, invalid_count).
         """
         valid = invalid = 0
-        for resource in self.list_resources():
-            if self.validate_resource(resource):
-                valid += 1
-            else:
-                invalid += 1
+        query = select(Resource.rname, Resource.rpath, Resource.etag).execution_options(yield_per=1000)
+
+        # Stream rows in batches and hash each batch concurrently, so memory
+        # stays bounded by the batch size rather than the number of resources.
+        with self.get_session() as session, ThreadPoolExecutor(max_workers=os.cpu_count()) as executor:
+            for rows in session.execute(query).partitions():
+                for is_valid in executor.map(lambda row: self._validate_file(*row), rows):
+                    if is_valid:
+                        valid += 1
+                    else:
+                        invalid += 1
+
         return valid, invalid
 
     def search(self, query: str, field: str = "rname", exact: bool = False) -> List[Resource]:
@@ -532,40 +982,51 @@ class BiocFileCache:
                 Search string.
 
             field:
-                Resource field to search ("rname", "rtype", "tags", etc.).
+                Resource field to search.
+                One of ``rname``, ``rtype``, ``rid`` or ``tags``.
+                Defaults to ``rname``.
 
             exact:
                 Whether to require exact match.
 
         Returns:
             List of matching resources.
+
+        Raises:
+            ValueError: If ``field`` is not searchable.
         """
+        column = self._SEARCHABLE_FIELDS.get(field)
+        if column is None:
+            raise ValueError(f"Invalid search field: {field}")
+
         with self.get_session() as session:
             if exact:
-                resources = session.query(Resource).filter(Resource[field] == query).all()
+                resources = session.query(Resource).filter(column == query).all()
             else:
-                resources = session.query(Resource).filter(Resource[field].ilike(f"%{query}%")).all()
+                resources = session.query(Resource).filter(column.ilike(f"%{query}%")).all()
 
             return [self._get_detached_resource(session, r) for r in resources]
 
     def get_stats(self) -> Dict[str, Any]:
         """Get statistics about the cache."""
+        now = datetime.now()
         with self.get_session() as session:
             total = session.query(Resource).count()
             expired = (
                 session.query(Resource)
                 .filter(
                     Resource.expires.isnot(None),  # Only check resources with expiration
-                    Resource.expires < datetime.now(),
+                    Resource.expires < now,
                 )
                 .count()
             )
             types = dict(session.query(Resource.rtype, func.count(Resource.id)).group_by(Resource.rtype).all())
+            size = session.query(func.sum(Resource.size_bytes)).scalar() or 0
 
             return {
                 "total_resources": total,
                 "expired_resources": expired,
-                "cache_size_bytes": self.get_cache_size(),
+                "cache_size_bytes": size,
                 "resource_types": types,
                 "last_cleanup": self._last_cleanup.isoformat(),
                 "cleanup_enabled": self.config.cleanup_interval is not None,
@@ -592,25 +1053,14 @@ class BiocFileCache:
 
                 for resource in resources:
                     try:
-                        Path(resource.rpath).unlink(missing_ok=True)
+                        self._remove_file(resource.rpath)
                     except Exception as e:
                         if not force:
-                            session.rollback()
                             raise BiocCacheError(f"Failed to remove file for resource '{resource.rname}'") from e
                         logger.warning(f"Failed to remove file for resource '{resource.rname}': {e}")
 
-                session.commit()
-
             if force:
-                for file in self.config.cache_dir.iterdir():
-                    if file.name != "BiocFileCache.sqlite":
-                        try:
-                            if file.is_file():
-                                file.unlink()
-                            elif file.is_dir():
-                                file.rmdir()
-                        except Exception as e:
-                            logger.warning(f"Failed to remove {file}: {e}")
+                self._clear_cache_dir()
 
             self._last_cleanup = datetime.now()
             return True
@@ -620,14 +1070,40 @@ class BiocFileCache:
                 raise BiocCacheError("Failed to purge cache") from e
 
             logger.error("Database cleanup failed, forcing file removal", exc_info=e)
-            for file in self.config.cache_dir.iterdir():
-                if file.name != "BiocFileCache.sqlite":
-                    try:
-                        if file.is_file():
-                            file.unlink()
-                        elif file.is_dir():
-                            file.rmdir()
-                    except Exception as file_e:
-                        logger.warning(f"Failed to remove {file}: {file_e}")
-
+            self._clear_cache_dir()
             return False
+
+    def reset(self) -> None:
+        """Remove all resources and metadata, keeping the database schema.
+
+        Runs :py:meth:`purge` and also deletes every metadata entry except
+        ``schema_version``, in a single transaction. The database and its
+        connections stay in place, so the cache can be reused right away.
+
+        Raises:
+            BiocCacheError: If the reset fails.
+        """
+        with self.batch():
+            self.purge()
+            with self.get_session() as session:
+                session.query(Metadata).filter(Metadata.key != "schema_version").delete()
+
+    def _clear_cache_dir(self) -> None:
+        """Remove every file in the cache directory except the database.
+
+        Uses :py:func:`os.scandir` so the file type comes from the directory
+        listing instead of an extra ``stat()`` per entry.
+        """
+        with os.scandir(self.config.cache_dir) as entries:
+            for entry in entries:
+                # Keep the database along with its -wal/-shm files
+                if entry.name.startswith("BiocFileCache.sqlite"):
+                    continue
+
+                try:
+                    if entry.is_file():
+                        os.unlink(entry.path)
+                    elif entry.is_dir():
+                        os.rmdir(entry.path)
+                except Exception as e:
+                    logger.warning(f"Failed to remove {entry.path}: {e}")
@@ -1,14 +1,15 @@
-from dataclasses import dataclass
+import re
+from dataclasses import dataclass, field
 from datetime import timedelta
 from pathlib import Path
-from typing import Optional
+from typing import Any, Dict, Optional
 
 __author__ = "Jayaram Kancherla"
 __copyright__ = "Jayaram Kancherla"
 __license__ = "MIT"
 
 
-@dataclass
+@dataclass(frozen=True)
 class CacheConfig:
     """Configuration for BiocFileCache.
 
@@ -32,6 +33,14 @@ class CacheConfig:
 
         compression:
             Whether to compress cached files.
+
+        sqlite_pragmas:
+            PRAGMA settings applied to every database connection.
+            Merged over the defaults in :py:data:`~.const.SQLITE_PRAGMAS`.
+
+        download_timeout:
+            Seconds to wait for a server when downloading web resources.
+            None to wait indefinitely.
     """
 
     cache_dir: Path
@@ -40,3 +49,9 @@ class CacheConfig:
     rname_pattern: str = r"^[a-zA-Z0-9_-]+$"
     hash_algorithm: str = "md5"
     compression: bool = False
+    sqlite_pragmas: Optional[Dict[str, Any]] = None
+    download_timeout: Optional[float] = 60
+    _rname_re: "re.Pattern" = field(init=False, repr=False, compare=False)
+
+    def __post_init__(self):
+        object.__setattr__(self, "_rname_re", re.compile(self.rname_pattern))
@@ -15,6 +15,10 @@ class RnameExistsError(BiocCacheError):
     """Resource name already exists in cache."""
 
 
+class MetadataExistsError(BiocCacheError):
+    """Metadata key already exists in cache."""
+
+
 class RpathTimeoutError(BiocCacheError):
     """Resource path does not exist after timeout."""
 
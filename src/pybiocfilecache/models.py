@@ -1,4 +1,4 @@
-from sqlalchemy import Column, DateTime, Integer, Text, func
+from sqlalchemy import Column, DateTime, Index, Integer, Text, func
 from sqlalchemy.orm import declarative_base
 
 __author__ = "Jayaram Kancherla"
@@ -12,8 +12,10 @@ class Metadata(Base):
     """Database metadata information."""
 
     __tablename__ = "metadata"
+    # Store rows directly in the primary key b-tree
+    __table_args__ = {"sqlite_with_rowid": False}
 
-    key = Column(Text(), primary_key=True, index=True)
+    key = Column(Text(), primary_key=True)
     value = Column(Text())
 
     def __repr__(self) -> str:
@@ -65,8 +67,14 @@ class Resource(Base):
     """
 
     __tablename__ = "resource"
-
-    id = Column(Integer, primary_key=True, index=True, autoincrement=True)
+    __table_args__ = (
+        Index("ix_resource_expires", "expires"),
+        Index("ix_resource_access_time", "access_time"),
+        # Covers lookups of rpath by rname without reading the table row
+        Index("ix_resource_rname_rpath", "rname", "rpath"),
+    )
+
+    id = Column(Integer, primary_key=True, autoincrement=True)
     rid = Column(Text(), index=True)
     rname = Column(Text(), index=True, unique=True)
     create_time = Column(DateTime, server_default=func.now())
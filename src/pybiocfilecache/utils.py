@@ -1,21 +1,34 @@
 import hashlib
 import logging
+import os
 import re
 import tempfile
+import urllib.request
 import uuid
-import zlib
+from functools import lru_cache
 from pathlib import Path
-from shutil import copy2, move
-from typing import Literal
+from shutil import copy2, copyfileobj, copystat, move
+from typing import TYPE_CHECKING, Literal, Optional, Union
 
 from .exceptions import BiocCacheError
 
+if TYPE_CHECKING:
+    import requests
+
+try:
+    # ISA-L's SIMD deflate, produces the same zlib streams
+    from isal import isal_zlib as zlib
+except ImportError:  # pragma: no cover
+    import zlib
+
 __author__ = "Jayaram Kancherla"
 __copyright__ = "Jayaram Kancherla"
 __license__ = "MIT"
 
 logger = logging.getLogger(__name__)
 
+CHUNK_SIZE = 1024 * 1024
+
 
 def create_tmp_dir() -> Path:
     """Create a temporary directory."""
@@ -27,16 +40,27 @@ def generate_id() -> str:
     return uuid.uuid4().hex
 
 
-def validate_rname(rname: str, pattern: str) -> bool:
+def validate_rname(rname: str, pattern: Union[str, re.Pattern]) -> bool:
     """Validate resource name format."""
-    return bool(re.match(pattern, rname))
+    if isinstance(pattern, str):
+        pattern = _compile_pattern(pattern)
+    return pattern.match(rname) is not None
+
+
+@lru_cache(maxsize=None)
+def _compile_pattern(pattern: str) -> re.Pattern:
+    return re.compile(pattern)
 
 
 def calculate_file_hash(path: Path, algorithm: str = "md5") -> str:
     """Calculate file checksum."""
-    hasher = hashlib.new(algorithm)
     with open(path, "rb") as f:
-        for chunk in iter(lambda: f.read(4096), b""):
+        if hasattr(hashlib, "file_digest"):
+            # Python 3.11+, hashes the file in C without the GIL
+            return hashlib.file_digest(f, algorithm).hexdigest()
+
+        hasher = hashlib.new(algorithm)
+        for chunk in iter(lambda: f.read(CHUNK_SIZE), b""):
             hasher.update(chunk)
     return hasher.hexdigest()
 
@@ -48,29 +72,146 @@ def get_file_size(path: Path) -> int:
 
 def compress_file(source: Path, target: Path) -> None:
     """Compress file using zlib."""
+    compressor = zlib.compressobj()
     with open(source, "rb") as sf, open(target, "wb") as tf:
-        tf.write(zlib.compress(sf.read()))
+        for chunk in iter(lambda: sf.read(CHUNK_SIZE), b""):
+            tf.write(compressor.compress(chunk))
+        tf.write(compressor.flush())
 
 
 def decompress_file(source: Path, target: Path) -> None:
     """Decompress file using zlib."""
+    decompressor = zlib.decompressobj()
     with open(source, "rb") as sf, open(target, "wb") as tf:
-        tf.write(zlib.decompress(sf.read()))
+        for chunk in iter(lambda: sf.read(CHUNK_SIZE), b""):
+            tf.write(decompressor.decompress(chunk))
+        tf.write(decompressor.flush())
+
+
+def create_http_session() -> Optional["requests.Session"]:
+    """Create a pooled HTTP session if :py:mod:`requests` is installed."""
+    try:
+        import requests
+    except ImportError:  # pragma: no cover
+        return None
+
+    return requests.Session()
+
+
+def download_web_file(
+    url: str, target: Path, session: Optional["requests.Session"] = None, timeout: Optional[float] = None
+) -> None:
+    """Download a web resource to ``target``.
+
+    HTTP(S) downloads go through ``session`` when given, reusing its open
+    connections; anything else is fetched with :py:mod:`urllib`.
+
+    Args:
+        url:
+            URL of the resource.
+
+        target:
+            Path to write the resource to.
+
+        session:
+            Optional session from :py:func:`create_http_session`.
+
+        timeout:
+            Seconds to wait for the server to connect or send data.
+            None to wait indefinitely.
+    """
+    try:
+        if session is not None and url.startswith(("http://", "https://")):
+            with session.get(url, stream=True, timeout=timeout) as response, open(target, "wb") as tf:
+                response.raise_for_status()
+                for chunk in response.iter_content(chunk_size=CHUNK_SIZE):
+                    tf.write(chunk)
+        else:
+            with urllib.request.urlopen(url, timeout=timeout) as response, open(target, "wb") as tf:
+                copyfileobj(response, tf, length=CHUNK_SIZE)
+    except Exception as e:
+        target.unlink(missing_ok=True)
+        raise BiocCacheError(f"Failed to download '{url}'") from e
+
+
+def copy_file(source: Path, target: Path) -> None:
+    """Copy a file into the cache, keeping its metadata.
+
+    An existing ``target`` is replaced rather than overwritten in place, which
+    could otherwise write through an earlier hard link into a user's file.
+    """
+    if target.exists():
+        target.unlink()
+
+    if copy_file_range(source, target):
+        copystat(source, target)
+    else:
+        copy2(source, target)
+
+
+def link_or_copy(source: Path, target: Path) -> None:
+    """Hard link a file into the cache, copying it if linking is not possible.
+
+    A hard link shares the data of ``source``, so nothing is copied when both
+    paths are on the same filesystem, but later changes to ``source`` also
+    change the cached file.
+    """
+    if target.exists():
+        if target.samefile(source):
+            return
+        target.unlink()
+
+    try:
+        os.link(source, target)
+    except OSError:
+        copy_file(source, target)
+
+
+def copy_file_range(source: Path, target: Path) -> bool:
+    """Copy a file inside the kernel with :py:func:`os.copy_file_range`.
+
+    Avoids moving the data through user space, and lets filesystems that
+    support it (e.g. Btrfs, XFS) share blocks instead of duplicating them.
+
+    Returns:
+        True if the file was copied, False if ``copy_file_range`` is not
+        available or not supported for these paths.
+    """
+    if not hasattr(os, "copy_file_range"):
+        return False
+
+    try:
+        with open(source, "rb") as sf, open(target, "wb") as tf:
+            remaining = os.fstat(sf.fileno()).st_size
+            while remaining > 0:
+                copied = os.copy_file_range(sf.fileno(), tf.fileno(), remaining)
+                if copied == 0:
+                    break
+                remaining -= copied
+    except OSError:
+        return False
+
+    return remaining == 0
 
 
 def copy_or_move(
-    source: Path, target: Path, rname: str, action: Literal["copy", "move", "asis"] = "copy", compress: bool = False
+    source: Path,
+    target: Path,
+    rname: str,
+    action: Literal["copy", "move", "link", "asis"] = "copy",
+    compress: bool = False,
 ) -> None:
-    """Copy or move a resource."""
-    if action not in ["copy", "move", "asis"]:
+    """Copy, move or link a resource."""
+    if action not in ["copy", "move", "link", "asis"]:
         raise ValueError(f"Invalid action: {action}")
 
     try:
-        if action == "copy":
-            if compress:
-                compress_file(source, target)
-            else:
-                copy2(source, target)
+        if action in ("copy", "link") and compress:
+            compress_file(source, target)
+        elif action == "copy":
+            copy_file(source, target)
+        elif action == "link":
+            link_or_copy(source, target)
         elif action == "move":
             if compress:
                 compress_file(source, target)
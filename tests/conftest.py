@@ -1,8 +1,76 @@
-"""Dummy conftest.py for pybiocfilecache. If you don't know what this is for, just leave it empty.
+"""Shared fixtures for pybiocfilecache tests.
 
 Read more about conftest.py under:
 - https://docs.pytest.org/en/stable/fixture.html
 - https://docs.pytest.org/en/stable/writing_plugins.html
 """
 
-# import pytest
+import os
+import shutil
+import tempfile
+from pathlib import Path
+
+import pytest
+
+from pybiocfilecache import BiocFileCache
+
+
+def _tmpfs_root():
+    """Use shared memory for cache directories when it is available and writable."""
+    if os.path.isdir("/dev/shm") and os.access("/dev/shm", os.W_OK):
+        return "/dev/shm"
+    return None
+
+
+@pytest.fixture
+def cache_dir():
+    path = Path(tempfile.mkdtemp(dir=_tmpfs_root()))
+    yield path
+    shutil.rmtree(path, ignore_errors=True)
+
+
+@pytest.fixture(scope="session")
+def bfc():
+    """A cache shared by the whole session, so the schema is only set up once."""
+    path = Path(tempfile.mkdtemp(dir=_tmpfs_root()))
+    cache = BiocFileCache(path)
+    yield cache
+    cache.close()
+    shutil.rmtree(path, ignore_errors=True)
+
+
+@pytest.fixture(autouse=True)
+def _reset_bfc(request):
+    """Empty the shared cache after each test that uses it."""
+    yield
+    if "bfc" in request.fixturenames:
+        request.getfixturevalue("bfc").reset()
+
+
+@pytest.fixture(scope="session")
+def web_resource(tmp_path_factory):
+    """A local stand-in for a web resource, served through a file:// URL."""
+    path = tmp_path_factory.mktemp("web") / "BiocFileCache_stats.tab"
+    path.write_text("package\tdownloads\nBiocFileCache\t100\n")
+    return path.as_uri()
+
+
+@pytest.fixture(scope="session")
+def data_dir():
+    return Path(__file__).parent / "data"
+
+
+@pytest.fixture(scope="session")
+def test1(data_dir):
+    return data_dir / "test1.txt"
+
+
+@pytest.fixture(scope="session")
+def test2(data_dir):
+    return data_dir / "test2.txt"
+
+
+@pytest.fixture(scope="session")
+def testdata(test1, test2):
+    """Contents of the test files, read once per session."""
+    return {path.stem: path.read_bytes() for path in (test1, test2)}
@@ -1,64 +1,165 @@
+import gc
+import json
 import os
 import shutil
+import socket
+import zlib
+from datetime import datetime, timedelta
+from functools import partial
+from http.server import SimpleHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+from threading import Thread
 
-from pybiocfilecache import BiocFileCache
+import pytest
+from sqlalchemy import event
+
+from pybiocfilecache import BiocFileCache, CacheConfig
+from pybiocfilecache.const import SCHEMA_VERSION
+from pybiocfilecache.exceptions import BiocCacheError, MetadataExistsError, RnameExistsError
+from pybiocfilecache.utils import decompress_file
 
 __author__ = "jkanche"
 __copyright__ = "jkanche"
 __license__ = "MIT"
 
-CACHE_DIR = os.getcwd() + "/cache"
-
 
-def test_create_cache():
-    bfc = BiocFileCache(CACHE_DIR)
-    assert os.path.exists(CACHE_DIR)
+def test_create_cache(cache_dir):
+    bfc = BiocFileCache(cache_dir)
+    assert os.path.exists(cache_dir)
+    assert bfc.get_metadata("schema_version") == SCHEMA_VERSION
 
     bfc.purge()
 
 
-def test_add_get_operations():
-    bfc = BiocFileCache(CACHE_DIR)
+def test_reset(bfc, test1):
+    rec1 = bfc.add("test1", test1)
+    bfc.add_metadata("language", "python")
+
+    bfc.reset()
+    assert bfc.count() == 0
+    assert not Path(rec1.rpath).exists()
+    assert not bfc.check_metadata_key("language")
+    assert bfc.get_metadata("schema_version") == SCHEMA_VERSION
+
+    bfc.add("test1", test1)
+    assert bfc.count() == 1
+
+
+def test_add_get_operations(bfc, tmp_path, test1, test2, testdata):
+    test3 = str(tmp_path / "test3.txt")
+    shutil.copy(test2, test3)
+
+    with bfc.batch():
+        bfc.add("test1", test1)
+        bfc.add("test2", test2)
+        bfc.add("test3_asis", test3, action="asis")
 
-    rtrip = bfc.add("test1", os.getcwd() + "/tests/data/test1.txt")
-    print("rtrip: ", rtrip)
     rec1 = bfc.get("test1")
-    print("rec1: ", rec1)
     assert rec1 is not None
-
-    bfc.add("test2", os.getcwd() + "/tests/data/test2.txt")
     rec2 = bfc.get("test2")
     assert rec2 is not None
+    rec3 = bfc.get("test3_asis")
+    assert rec3 is not None
+    assert rec3.rpath == test3
 
-    frec1 = open(rec1.rpath, "r").read().strip()
-    assert frec1 == "test1"
+    assert Path(rec1.rpath).read_bytes() == testdata["test1"]
+    assert Path(rec2.rpath).read_bytes() == testdata["test2"]
+    assert Path(rec3.rpath).read_bytes() == testdata["test2"]
 
-    frec2 = open(rec2.rpath, "r").read().strip()
-    assert frec2 == "test2"
+    assert bfc.count() == 3
+    assert bfc.count(rtype="local") == 3
+    assert bfc.count(rtype="web") == 0
 
-    shutil.copy(os.getcwd() + "/tests/data/test2.txt", os.getcwd() + "/tests/data/test3.txt")
-    bfc.add("test3_asis", os.getcwd() + "/tests/data/test3.txt", action="asis")
-    rec3 = bfc.get("test3_asis")
-    assert rec3 is not None
-    assert rec3.rpath == os.getcwd() + "/tests/data/test3.txt"
 
-    frec3 = open(rec3.rpath, "r").read().strip()
-    assert frec3 == "test2"
+def test_batch_rollback(bfc, test1, test2):
+    with pytest.raises(RnameExistsError):
+        with bfc.batch():
+            bfc.add("test1", test1)
+            bfc.add("test1", test2)
 
-    rtrip = bfc.list_resources()
-    assert len(rtrip) == 3
+    assert bfc.get("test1") is None
 
-    bfc.purge()
+    with pytest.raises(BiocCacheError):
+        bfc.add_batch(
+            [
+                {"rname": "test1", "fpath": test1},
+                {"rname": "test2", "fpath": "missing.txt"},
+            ]
+        )
+
+    assert bfc.count() == 0
+
+
+def test_batch_rollback_restores_files(bfc, tmp_path, test1, test2, testdata):
+    src = tmp_path / "src.txt"
+    shutil.copy(test1, src)
+
+    with pytest.raises(BiocCacheError):
+        bfc.add_batch(
+            [
+                {"rname": "moved", "fpath": src, "action": "move"},
+                {"rname": "copied", "fpath": test2},
+                {"rname": "missing", "fpath": "missing.txt"},
+            ]
+        )
+
+    assert src.read_bytes() == testdata["test1"]
+    assert bfc.count() == 0
+    assert [p.name for p in bfc.config.cache_dir.iterdir() if not p.name.startswith("BiocFileCache.sqlite")] == []
+
+    rec = bfc.add("test1", test1)
+    with pytest.raises(RuntimeError):
+        with bfc.batch():
+            bfc.update("test1", test2)
+            raise RuntimeError("rollback")
+
+    assert Path(rec.rpath).read_bytes() == testdata["test1"]
+    assert bfc.verify_cache() == (1, 0)
+    assert len(list(bfc.config.cache_dir.glob("*.bak"))) == 0
+
+    with bfc.batch():
+        bfc.update("test1", test2)
+
+    assert Path(rec.rpath).read_bytes() == testdata["test2"]
+    assert len(list(bfc.config.cache_dir.glob("*.bak"))) == 0
+
+
+def test_batch_rollback_restores_removed_files(bfc, test1, test2, testdata):
+    rec1 = bfc.add("test1", test1)
+    rec2 = bfc.add("test2", test2)
+
+    with pytest.raises(RuntimeError):
+        with bfc.batch():
+            bfc.remove("test1")
+            raise RuntimeError("rollback")
+
+    assert Path(rec1.rpath).read_bytes() == testdata["test1"]
+    assert bfc.verify_cache() == (2, 0)
+
+    with pytest.raises(RuntimeError):
+        with bfc.batch():
+            bfc.purge()
+            raise RuntimeError("rollback")
+
+    assert Path(rec1.rpath).read_bytes() == testdata["test1"]
+    assert Path(rec2.rpath).read_bytes() == testdata["test2"]
+    assert bfc.verify_cache() == (2, 0)
+    assert len(list(bfc.config.cache_dir.glob("*.bak"))) == 0
 
+    with bfc.batch():
+        bfc.remove("test1")
 
-def test_remove_operations():
-    bfc = BiocFileCache(CACHE_DIR)
+    assert not Path(rec1.rpath).exists()
+    assert bfc.count() == 1
+    assert len(list(bfc.config.cache_dir.glob("*.bak"))) == 0
 
-    bfc.add("test1", os.getcwd() + "/tests/data/test1.txt")
+
+def test_remove_operations(bfc, test1, test2):
+    bfc.add("test1", test1)
     rec1 = bfc.get("test1")
     assert rec1 is not None
 
-    bfc.add("test2", os.getcwd() + "/tests/data/test2.txt")
+    bfc.add("test2", test2)
     rec2 = bfc.get("test2")
     assert rec2 is not None
 
@@ -66,4 +167,304 @@ def test_remove_operations():
     rec1 = bfc.get("test1")
     assert rec1 is None
 
+
+def test_add_existing_rname(bfc, test1, test2):
+    bfc.add("test1", test1)
+    with pytest.raises(RnameExistsError):
+        bfc.add("test1", test2)
+
+
+def test_search(bfc, test1, test2):
+    bfc.add("test1", test1, tags=["raw"])
+    bfc.add("test2", test2)
+
+    assert [r.rname for r in bfc.search("test1", exact=True)] == ["test1"]
+    assert len(bfc.search("test")) == 2
+    assert [r.rname for r in bfc.search("raw", field="tags")] == ["test1"]
+
+    with pytest.raises(ValueError):
+        bfc.search("test1", field="rpath")
+
+
+def test_meta_operations(bfc):
+    assert not bfc.check_metadata_key("language")
+    bfc.add_metadata("language", "python")
+    assert bfc.check_metadata_key("language")
+    assert bfc.get_metadata("language") == "python"
+
+    with pytest.raises(MetadataExistsError):
+        bfc.add_metadata("language", "R")
+    assert bfc.get_metadata("language") == "python"
+
+    with bfc.engine.connect() as conn:
+        ddl = conn.exec_driver_sql("SELECT sql FROM sqlite_master WHERE name = 'metadata'").scalar()
+    assert "WITHOUT ROWID" in ddl
+
+
+def test_verify_cache(bfc, test1, test2):
+    bfc.add("test1", test1)
+    rec2 = bfc.add("test2", test2)
+    assert bfc.verify_cache() == (2, 0)
+
+    os.unlink(rec2.rpath)
+    with open(rec2.rpath, "w") as f:
+        f.write("corrupted")
+    assert bfc.verify_cache() == (1, 1)
+
+
+def test_get_stats(bfc, test1, test2):
+    bfc.add("test1", test1)
+    bfc.add("test2", test2, expires=datetime.now() - timedelta(days=1))
+
+    stats = bfc.get_stats()
+    assert stats["total_resources"] == 2
+    assert stats["expired_resources"] == 1
+    assert stats["cache_size_bytes"] == bfc.get_cache_size()
+    assert stats["resource_types"] == {"local": 2}
+
+    assert [r.rname for r in bfc.list_resources(expired=True)] == ["test2"]
+    assert [r.rname for r in bfc.list_resources(expired=False)] == ["test1"]
+
+
+def test_default_sqlite_pragmas(bfc):
+    with bfc.engine.connect() as conn:
+        assert conn.exec_driver_sql("PRAGMA journal_mode").scalar() == "wal"
+        assert conn.exec_driver_sql("PRAGMA synchronous").scalar() == 1  # NORMAL
+        assert conn.exec_driver_sql("PRAGMA temp_store").scalar() == 2  # MEMORY
+        assert conn.exec_driver_sql("PRAGMA mmap_size").scalar() == 268435456
+
+
+def test_cleanup(cache_dir, test1, test2):
+    config = CacheConfig(cache_dir=cache_dir, cleanup_interval=timedelta(0))
+    bfc = BiocFileCache(config=config)
+
+    statements = []
+    event.listen(bfc.engine, "before_cursor_execute", lambda *args: statements.append(args[2]))
+
+    bfc.add("test1", test1, expires=datetime.now() - timedelta(days=1))
+    bfc.add("test2", test2, expires=datetime.now() + timedelta(days=1))
+
+    assert bfc.cleanup() == 1
+    assert bfc.get("test1") is None
+
+    # Nothing added and nothing due yet
+    statements.clear()
+    assert bfc.cleanup() == 0
+    assert statements == []
+
+    # Resources added through another cache on the same directory are seen
+    BiocFileCache(config=config).add("test3", test1, expires=datetime.now() - timedelta(days=1))
+    assert bfc.cleanup() == 1
+    assert bfc.count() == 1
+
+
+def test_cleanup_with_batches(cache_dir, test1, test2):
+    config = CacheConfig(cache_dir=cache_dir, cleanup_interval=timedelta(0))
+    bfc1 = BiocFileCache(config=config)
+    bfc2 = BiocFileCache(config=config)
+    expired = datetime.now() - timedelta(days=1)
+
+    # A sweep that is rolled back leaves the expired resource to the next one
+    bfc1.add("test1", test1, expires=expired)
+    with pytest.raises(RuntimeError):
+        with bfc1.batch():
+            assert bfc1.cleanup() == 1
+            raise RuntimeError("rollback")
+
+    assert bfc1.cleanup() == 1
+    assert bfc1.count() == 0
+
+    # A sweep that runs before a resource is committed does not hide it
+    with bfc1.batch():
+        bfc1.add("test2", test2, expires=expired)
+        assert bfc2.cleanup() == 0
+
+    assert bfc2.cleanup() == 1
+    assert bfc2.count() == 0
+
+
+def test_export_import_metadata(cache_dir, tmp_path, test1, test2):
+    config = CacheConfig(cache_dir=cache_dir, cleanup_interval=timedelta(0))
+    bfc = BiocFileCache(config=config)
+    bfc.add("test1", test1, tags=["raw"])
+    bfc.add("test2", test2)
+    assert bfc.cleanup() == 0
+
+    path = tmp_path / "metadata.json"
+    bfc.export_metadata(path)
+    data = json.loads(path.read_text())
+    assert [r["rname"] for r in data["resources"]] == ["test1", "test2"]
+
+    data["resources"][0]["tags"] = "processed"
+    data["resources"][0]["expires"] = (datetime.now() - timedelta(days=1)).isoformat()
+    data["resources"].append({"rname": "missing", "tags": None, "expires": None})
+    path.write_text(json.dumps(data))
+
+    bfc.import_metadata(path)
+    assert bfc.get("test1").tags == "processed"
+    assert bfc.get("missing") is None
+
+    # Imported expirations are picked up by the next cleanup
+    assert bfc.cleanup() == 1
+    assert bfc.get("test1") is None
+    assert bfc.count() == 1
+
+
+def test_sqlite_pragmas(cache_dir):
+    config = CacheConfig(cache_dir=cache_dir, sqlite_pragmas={"busy_timeout": 1000})
+    bfc = BiocFileCache(config=config)
+
+    with bfc.engine.connect() as conn:
+        assert conn.exec_driver_sql("PRAGMA journal_mode").scalar() == "wal"
+        assert conn.exec_driver_sql("PRAGMA synchronous").scalar() == 1  # NORMAL
+        assert conn.exec_driver_sql("PRAGMA busy_timeout").scalar() == 1000
+
+    bfc.close()
+
+
+def test_shared_engine(cache_dir):
+    bfc1 = BiocFileCache(cache_dir)
+    bfc2 = BiocFileCache(cache_dir)
+    assert bfc1.engine is bfc2.engine
+
+    # Closing one cache leaves the engine to the other
+    bfc1.close()
+    bfc1.close()
+    assert BiocFileCache(cache_dir).engine is bfc2.engine
+
+    shutil.rmtree(cache_dir)
+    bfc3 = BiocFileCache(cache_dir)
+    assert bfc3.engine is not bfc2.engine
+    assert bfc3.get_metadata("schema_version") == SCHEMA_VERSION
+
+    # Closing the last cache using an engine releases its connections
+    bfc3.close()
+    assert bfc3.engine.pool.checkedin() == 0
+    assert BiocFileCache(cache_dir).engine is not bfc3.engine
+    shutil.rmtree(cache_dir)
+
+
+def test_close_after_cache_dir_removed(cache_dir):
+    bfc = BiocFileCache(cache_dir)
+    bfc.engine.dispose()
+    shutil.rmtree(cache_dir)
+
+    with bfc:
+        pass
+    bfc.close()
+
+
+def test_engine_released_when_cache_is_collected(cache_dir):
+    engine = BiocFileCache(cache_dir).engine
+    gc.collect()
+    assert engine.pool.checkedin() == 0
+    assert BiocFileCache(cache_dir).engine is not engine
+
+
+def test_compression(cache_dir, test1, testdata):
+    bfc = BiocFileCache(config=CacheConfig(cache_dir=cache_dir, compression=True))
+
+    rec1 = bfc.add("test1", test1)
+    assert zlib.decompress(Path(rec1.rpath).read_bytes()) == testdata["test1"]
+
+    decompress_file(Path(rec1.rpath), cache_dir / "test1_out.txt")
+    assert (cache_dir / "test1_out.txt").read_bytes() == testdata["test1"]
+
     bfc.purge()
+
+
+def test_missing_indexes_are_created(cache_dir):
+    bfc = BiocFileCache(cache_dir)
+    with bfc.engine.begin() as conn:
+        conn.exec_driver_sql("DROP INDEX ix_resource_expires")
+
+    # An older cache is upgraded when it is opened again after being closed
+    bfc.close()
+    bfc = BiocFileCache(cache_dir)
+    with bfc.engine.connect() as conn:
+        indexes = conn.exec_driver_sql("SELECT name FROM sqlite_master WHERE type = 'index'").scalars().all()
+    assert "ix_resource_expires" in indexes
+
+
+def test_add_web_resource(bfc, web_resource):
+    rec = bfc.add("download_link", web_resource, rtype="web", ext=True)
+    assert rec.fpath == web_resource
+    assert rec.rtype == "web"
+    assert rec.rpath.endswith(".tab")
+    assert Path(rec.rpath).read_text().startswith("package\tdownloads")
+    assert [p.name for p in bfc.config.cache_dir.glob("*.download")] == []
+
+
+def test_copy_is_independent_of_source(bfc, cache_dir, test1, testdata):
+    src = cache_dir / "src.txt"
+    shutil.copy(test1, src)
+
+    rec = bfc.add("test1", src)
+    assert not os.path.samefile(rec.rpath, src)
+
+    with open(src, "ab") as f:
+        f.write(b"changed")
+    assert Path(rec.rpath).read_bytes() == testdata["test1"]
+    assert bfc.verify_cache() == (1, 0)
+
+
+def test_link_on_same_filesystem(bfc, cache_dir, test1, testdata):
+    src = cache_dir / "src.txt"
+    shutil.copy(test1, src)
+
+    rec = bfc.add("test1", src, action="link")
+    assert Path(rec.rpath).read_bytes() == testdata["test1"]
+    if os.stat(src).st_dev == os.stat(bfc.config.cache_dir).st_dev:
+        assert os.path.samefile(rec.rpath, src)
+
+
+def test_add_web_resource_over_http(bfc, data_dir, testdata):
+    handler = partial(SimpleHTTPRequestHandler, directory=str(data_dir))
+    with ThreadingHTTPServer(("127.0.0.1", 0), handler) as server:
+        Thread(target=server.serve_forever, daemon=True).start()
+        base = f"http://127.0.0.1:{server.server_address[1]}"
+        try:
+            rec1 = bfc.add("http1", f"{base}/test1.txt", rtype="web")
+            rec2 = bfc.add("http2", f"{base}/test2.txt", rtype="web")
+            with pytest.raises(BiocCacheError):
+                bfc.add("http3", f"{base}/missing.txt", rtype="web")
+        finally:
+            server.shutdown()
+
+    assert Path(rec1.rpath).read_bytes() == testdata["test1"]
+    assert Path(rec2.rpath).read_bytes() == testdata["test2"]
+    assert bfc.count(rtype="web") == 2
+
+
+def test_web_download_timeout(cache_dir):
+    bfc = BiocFileCache(config=CacheConfig(cache_dir=cache_dir, download_timeout=0.5))
+
+    # Accepts connections but never answers
+    with socket.create_server(("127.0.0.1", 0)) as server:
+        url = f"http://127.0.0.1:{server.getsockname()[1]}/stalled.txt"
+        with pytest.raises(BiocCacheError):
+            bfc.add("stalled", url, rtype="web")
+
+    assert bfc.count() == 0
+    assert list(cache_dir.glob("*.download")) == []
+
+
+def test_link_falls_back_to_copy(bfc, monkeypatch, test1, testdata):
+    def no_link(source, target):
+        raise OSError("links not supported")
+
+    monkeypatch.setattr(os, "link", no_link)
+
+    rec = bfc.add("test1", test1, action="link")
+    assert not os.path.samefile(rec.rpath, test1)
+    assert Path(rec.rpath).read_bytes() == testdata["test1"]
+
+
+def test_update_does_not_modify_source(bfc, cache_dir, test1, test2, testdata):
+    src = cache_dir / "src.txt"
+    shutil.copy(test1, src)
+    bfc.add("test1", src, action="link")
+
+    rec = bfc.update("test1", test2)
+    assert Path(rec.rpath).read_bytes() == testdata["test2"]
+    assert src.read_bytes() == testdata["test1"]